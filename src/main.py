@@ -1,4 +1,4 @@
-from fastapi import FastAPI, HTTPException, Depends, Request  
+from fastapi import FastAPI, HTTPException, Depends, Request, Response
 from starlette.middleware.base import BaseHTTPMiddleware      
 from pydantic import BaseModel, field_validator
 from sqlalchemy.orm import Session
@@ -7,25 +7,101 @@ from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 from datetime import datetime
 from fastapi.exceptions import RequestValidationError
-from fastapi.responses import JSONResponse
+from starlette.exceptions import HTTPException as StarletteHTTPException
+from contextlib import asynccontextmanager
+import asyncio
 import httpx
 import os
 import re
 import contextvars
 
+from src.partitioning import ensure_future_partitions
+from src.readiness import GatewayStats, ReadinessProbe
+from src.responses import FastJSONResponse, constant_json, error_response
+
 # Database setup
 SQLALCHEMY_DATABASE_URL = os.getenv("DATABASE_URL", "postgresql://postgres:secretpassword@db:5432/shop_db")
 
 x_test_id_ctx = contextvars.ContextVar("x_test_id", default=None)
 
-engine = create_engine(SQLALCHEMY_DATABASE_URL)
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+
+if SQLALCHEMY_DATABASE_URL.startswith("sqlite"):
+    # SQLite pools (used by the tests) take no size/overflow settings
+    engine = create_engine(SQLALCHEMY_DATABASE_URL)
+else:
+    engine = create_engine(SQLALCHEMY_DATABASE_URL, pool_size=DB_POOL_SIZE, max_overflow=DB_MAX_OVERFLOW)
 
 Base = declarative_base()
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Monthly partitions of `orders` (Postgres only, no-op until the migration has run)
+ORDERS_PARTITION_MONTHS_AHEAD = int(os.getenv("ORDERS_PARTITION_MONTHS_AHEAD", "3"))
+ORDERS_PARTITION_CHECK_INTERVAL = float(os.getenv("ORDERS_PARTITION_CHECK_INTERVAL", "86400"))
+
+async def maintain_order_partitions():
+    while True:
+        try:
+            await asyncio.to_thread(ensure_future_partitions, engine, ORDERS_PARTITION_MONTHS_AHEAD)
+        except Exception as exc:
+            # failed months are retried next run; their rows land in orders_default meanwhile
+            print(f"⚠️ Failed to create order partitions: {exc}")
+        await asyncio.sleep(ORDERS_PARTITION_CHECK_INTERVAL)
+
+# Payment gateway: one shared client per app lifespan so connections are pooled
+# and /ready can report usage. It is bound to the event loop that runs the app,
+# so it is created in lifespan() rather than at import time.
+PAYMENT_GATEWAY_URL = os.getenv("PAYMENT_GATEWAY_URL", "http://mockserver:1080")
+GATEWAY_MAX_CONNECTIONS = int(os.getenv("GATEWAY_MAX_CONNECTIONS", "100"))
+
+def make_http_client():
+    return httpx.AsyncClient(limits=httpx.Limits(max_connections=GATEWAY_MAX_CONNECTIONS))
+
+def make_gateway_stats():
+    return GatewayStats(
+        max_connections=GATEWAY_MAX_CONNECTIONS,
+        window_seconds=float(os.getenv("READY_GATEWAY_ERROR_WINDOW", "60")),
+        min_samples=int(os.getenv("READY_GATEWAY_MIN_SAMPLES", "5")),
+    )
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    http_client = make_http_client()
+    gateway_stats = make_gateway_stats()
+
+    async def check_gateway():
+        # any HTTP response means the gateway is reachable
+        await http_client.get(PAYMENT_GATEWAY_URL)
+
+    readiness_probe = ReadinessProbe(
+        engine,
+        gateway_stats,
+        check_gateway,
+        interval=float(os.getenv("READY_CHECK_INTERVAL", "5")),
+        check_timeout=float(os.getenv("READY_CHECK_TIMEOUT", "2")),
+        db_max_overflow=DB_MAX_OVERFLOW,
+        db_pool_max_utilization=float(os.getenv("READY_DB_POOL_MAX_UTILIZATION", "0.9")),
+        http_pool_max_utilization=float(os.getenv("READY_HTTP_POOL_MAX_UTILIZATION", "0.9")),
+        gateway_max_error_rate=float(os.getenv("READY_GATEWAY_MAX_ERROR_RATE", "0.5")),
+    )
+    app.state.http_client = http_client
+    app.state.gateway_stats = gateway_stats
+    app.state.readiness_probe = readiness_probe
+
+    tasks = [asyncio.create_task(readiness_probe.run())]
+    if engine.dialect.name == "postgresql":
+        tasks.append(asyncio.create_task(maintain_order_partitions()))
+    yield
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+    await http_client.aclose()
+    del app.state.http_client, app.state.gateway_stats, app.state.readiness_probe
+
 # FastAPI app
-app = FastAPI()
+app = FastAPI(lifespan=lifespan, default_response_class=FastJSONResponse)
 
 class TestIdMiddleware(BaseHTTPMiddleware):
     async def dispatch(self, request: Request, call_next):
@@ -61,10 +137,15 @@ async def validation_exception_handler(request: Request, exc: RequestValidationE
         custom_msg = error_msg.replace("Value error, ", "")
 
     # บังคับตอบ 400 Bad Request พร้อม Format JSON เป๊ะๆ ตาม Spec
-    return JSONResponse(
-        status_code=400,
-        content={"detail": custom_msg}
-    )
+    return error_response(400, custom_msg)
+
+@app.exception_handler(StarletteHTTPException)
+async def http_exception_handler(request: Request, exc: StarletteHTTPException):
+    # Same output as FastAPI's default handler, but fixed details are encoded once
+    headers = getattr(exc, "headers", None)
+    if exc.status_code < 200 or exc.status_code in (204, 205, 304):
+        return Response(status_code=exc.status_code, headers=headers)
+    return error_response(exc.status_code, exc.detail, headers=headers)
 
 def get_forward_headers():
     test_id = x_test_id_ctx.get()
@@ -95,6 +176,16 @@ def get_db():
     finally:
         db.close()
 
+async def get_gateway(request: Request):
+    state = request.app.state
+    http_client = getattr(state, "http_client", None)
+    if http_client is not None:
+        yield http_client, state.gateway_stats
+        return
+    # lifespan not running (e.g. TestClient used without `with`): per-request client
+    async with httpx.AsyncClient() as http_client:
+        yield http_client, make_gateway_stats()
+
 # Pydantic models
 class CheckoutRequest(BaseModel):
     user_id: int
@@ -128,26 +219,32 @@ class CheckoutResponse(BaseModel):
 class PaymentErrorResponse(BaseModel):
     error: str
 
+# Constant bodies are encoded once at import; returning a Response directly
+# also skips response_model re-validation (the model is kept for the docs)
+ORDER_COMPLETED_RESPONSE = constant_json({"order_status": "COMPLETED"}, status_code=201)
+READY_STARTING_RESPONSE = constant_json({"status": "starting"}, status_code=503)
+
 # API endpoints
 @app.post("/api/v1/checkout", response_model=CheckoutResponse, status_code=201)
-async def checkout(request: CheckoutRequest, db: Session = Depends(get_db)):
+async def checkout(request: CheckoutRequest, db: Session = Depends(get_db), gateway=Depends(get_gateway)):
     # Check if user exists
     user = db.query(User).filter(User.id == request.user_id).first()
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
 
     # Call external payment gateway
-    payment_url = "http://mockserver:1080/external/payment/charge"
-    async with httpx.AsyncClient() as client:
-        payment_response = await client.post(
-            payment_url,
-            json={
-                "user_id": request.user_id,
-                "product_id": request.product_id,
-                "amount": request.amount
-            },
-            headers=get_forward_headers()
-        )
+    payment_url = f"{PAYMENT_GATEWAY_URL}/external/payment/charge"
+    http_client, gateway_stats = gateway
+    payment_response = await gateway_stats.post(
+        http_client,
+        payment_url,
+        json={
+            "user_id": request.user_id,
+            "product_id": request.product_id,
+            "amount": request.amount
+        },
+        headers=get_forward_headers()
+    )
 
     if payment_response.status_code == 200:
         # Payment successful, create order
@@ -160,7 +257,7 @@ async def checkout(request: CheckoutRequest, db: Session = Depends(get_db)):
         db.add(order)
         db.commit()
         db.refresh(order)
-        return CheckoutResponse(order_status="COMPLETED")
+        return ORDER_COMPLETED_RESPONSE()
     elif payment_response.status_code == 400:
         # Payment declined
         raise HTTPException(status_code=402, detail="Payment Declined")
@@ -168,6 +265,14 @@ async def checkout(request: CheckoutRequest, db: Session = Depends(get_db)):
         # Other error
         raise HTTPException(status_code=400, detail="Payment processing failed")
 
+@app.get("/ready")
+async def ready(request: Request):
+    # served from the cache filled by readiness_probe.run(); no I/O per probe
+    readiness_probe = getattr(request.app.state, "readiness_probe", None)
+    if readiness_probe is None:
+        return READY_STARTING_RESPONSE()
+    return readiness_probe.response()
+
 # Existing endpoints (keep them)
 class PasswordRequest(BaseModel):
     password: str
@@ -182,13 +287,13 @@ class PasswordRequest(BaseModel):
 def greet(name: str):
     if not name.isalpha():
         raise HTTPException(status_code=400, detail='Name must contain only alphabets')
-    return {'message': f'Hello, {name}!'}
+    return FastJSONResponse({'message': f'Hello, {name}!'})
 
 @app.get('/reverse/{text}')
 def reverse_string(text: str):
     if not text.strip():
         raise HTTPException(status_code=400, detail='Text cannot be empty or contain only spaces')
-    return {'original': text, 'reversed': text[::-1]}
+    return FastJSONResponse({'original': text, 'reversed': text[::-1]})
 
 @app.post('/check-password')
 def check_password(request: PasswordRequest):
@@ -218,8 +323,8 @@ def check_password(request: PasswordRequest):
 
     strength = "Weak" if score <= 1 else "Medium" if score <= 3 else "Strong"
 
-    return {
+    return FastJSONResponse({
         "score": score,
         "strength": strength,
         "feedback": feedback
-    }
\ No newline at end of file
+    })
\ No newline at end of file
@@ -0,0 +1,275 @@
+"""Monthly range partitioning for the `orders` table (Postgres only).
+
+The `orders` table is partitioned by RANGE on `created_at`, one partition per
+calendar month (named `orders_pYYYY_MM`) plus an `orders_default` partition
+that catches anything outside the prepared range so inserts never fail.
+
+- ensure_future_partitions(): creates the current month and the next N months
+  if they don't exist yet. Called on app startup and periodically afterwards.
+- archive_partitions(): exports each partition older than a cutoff to a
+  gzip-compressed CSV, then detaches and drops it.
+
+This module must not import src.main, which connects to the database at
+import time.
+
+CLI:
+    python -m src.partitioning ensure --months-ahead 3
+    python -m src.partitioning archive --older-than-months 12 --export-dir ./archive
+"""
+import argparse
+import gzip
+import os
+import re
+import sys
+from datetime import date, datetime
+
+from sqlalchemy import create_engine, text
+
+PARENT_TABLE = "orders"
+DEFAULT_PARTITION = "orders_default"
+PARTITION_NAME_RE = re.compile(r"^orders_p(\d{4})_(\d{2})$")
+
+
+class PartitionCreationError(Exception):
+    """Raised after create_partitions() has tried every month and some failed."""
+
+    def __init__(self, created, failed):
+        self.created = created
+        self.failed = failed
+        details = "; ".join(f"{name}: {exc}" for name, exc in failed.items())
+        super().__init__(f"failed to create {len(failed)} partition(s): {details}")
+
+
+def month_start(value):
+    """Return the first day of the month containing `value`."""
+    return date(value.year, value.month, 1)
+
+
+def add_months(value, months):
+    """Shift a first-of-month date by `months` (may be negative)."""
+    index = value.year * 12 + (value.month - 1) + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(start):
+    return f"orders_p{start.year:04d}_{start.month:02d}"
+
+
+def parse_partition_name(name):
+    """Return the month start encoded in a partition name, or None."""
+    match = PARTITION_NAME_RE.match(name)
+    if not match:
+        return None
+    return date(int(match.group(1)), int(match.group(2)), 1)
+
+
+def create_partition_sql(start):
+    end = add_months(start, 1)
+    return (
+        f"CREATE TABLE {partition_name(start)} "
+        f"PARTITION OF {PARENT_TABLE} "
+        f"FOR VALUES FROM ('{start.isoformat()}') TO ('{end.isoformat()}')"
+    )
+
+
+def is_partitioned(conn):
+    """True when `orders` exists and is a partitioned table (Postgres only)."""
+    if conn.dialect.name != "postgresql":
+        return False
+    row = conn.execute(text(
+        "SELECT 1 FROM pg_partitioned_table p "
+        "JOIN pg_class c ON c.oid = p.partrelid "
+        "WHERE c.relname = :name AND pg_table_is_visible(c.oid)"
+    ), {"name": PARENT_TABLE}).first()
+    return row is not None
+
+
+def list_partitions(conn):
+    """Return the names of the partitions currently attached to `orders`."""
+    rows = conn.execute(text(
+        "SELECT child.relname FROM pg_inherits i "
+        "JOIN pg_class parent ON parent.oid = i.inhparent "
+        "JOIN pg_class child ON child.oid = i.inhrelid "
+        "WHERE parent.relname = :name AND pg_table_is_visible(parent.oid)"
+    ), {"name": PARENT_TABLE})
+    return sorted(row[0] for row in rows)
+
+
+def list_orphaned_partitions(conn):
+    """Return monthly tables that are no longer attached to `orders`.
+
+    These are left over from an archive run that detached a partition but
+    never dropped it. They are picked up again by the next archive run.
+    """
+    rows = conn.execute(text(
+        "SELECT c.relname FROM pg_class c "
+        "WHERE c.relkind = 'r' AND c.relname LIKE 'orders\\_p%' "
+        "AND pg_table_is_visible(c.oid) AND NOT c.relispartition"
+    ))
+    return sorted(row[0] for row in rows if PARTITION_NAME_RE.match(row[0]))
+
+
+def archive_candidates(names, cutoff):
+    """Pick the monthly tables whose whole month ends on or before `cutoff`."""
+    candidates = []
+    for name in names:
+        start = parse_partition_name(name)
+        # orders_default has no month and is never archived
+        if start is not None and add_months(start, 1) <= cutoff:
+            candidates.append(name)
+    return sorted(candidates)
+
+
+def create_partition(conn, start):
+    """Create the partition for one month, moving its rows out of orders_default.
+
+    Postgres refuses to create a partition while the default partition holds
+    rows for that range, which happens after a long maintenance gap or with
+    future-dated `created_at` values.
+    """
+    name = partition_name(start)
+    bounds = {"start": start, "end": add_months(start, 1)}
+    stray = conn.execute(text(
+        f"SELECT 1 FROM {DEFAULT_PARTITION} "
+        "WHERE created_at >= :start AND created_at < :end LIMIT 1"
+    ), bounds).first()
+    if stray is None:
+        conn.execute(text(create_partition_sql(start)))
+        return
+
+    conn.execute(text(f"CREATE TABLE {name} (LIKE {PARENT_TABLE} INCLUDING DEFAULTS)"))
+    conn.execute(text(
+        f"WITH moved AS (DELETE FROM {DEFAULT_PARTITION} "
+        "WHERE created_at >= :start AND created_at < :end RETURNING *) "
+        f"INSERT INTO {name} SELECT * FROM moved"
+    ), bounds)
+    conn.execute(text(
+        f"ALTER TABLE {PARENT_TABLE} ATTACH PARTITION {name} "
+        f"FOR VALUES FROM ('{bounds['start'].isoformat()}') TO ('{bounds['end'].isoformat()}')"
+    ))
+
+
+def create_partitions(engine, first_month, last_month):
+    """Create monthly partitions for every month in [first_month, last_month].
+
+    Each month gets its own transaction, so one bad month does not block the
+    later ones. Returns the created names; if any month failed, raises
+    PartitionCreationError once every month has been tried.
+    """
+    with engine.connect() as conn:
+        existing = set(list_partitions(conn))
+    created = []
+    failed = {}
+    start = month_start(first_month)
+    while start <= last_month:
+        name = partition_name(start)
+        if name not in existing:
+            try:
+                with engine.begin() as conn:
+                    create_partition(conn, start)
+                created.append(name)
+            except Exception as exc:
+                failed[name] = exc
+        start = add_months(start, 1)
+    if failed:
+        raise PartitionCreationError(created, failed)
+    return created
+
+
+def ensure_future_partitions(engine, months_ahead=3, today=None):
+    """Make sure partitions exist for this month and the next `months_ahead`.
+
+    Does nothing on non-Postgres databases or while `orders` is still a plain
+    table (i.e. the partitioning migration has not run yet).
+    """
+    current = month_start(today or datetime.utcnow())
+    with engine.connect() as conn:
+        if not is_partitioned(conn):
+            return []
+    return create_partitions(engine, current, add_months(current, months_ahead))
+
+
+def archive_partitions(engine, older_than_months, export_dir, today=None):
+    """Export, detach and drop monthly partitions older than the cutoff.
+
+    A partition is archived when its whole month ends on or before the first
+    day of (current month - older_than_months). Partitions are handled one at
+    a time: each is written to `<export_dir>/<partition>.csv.gz` and only then
+    detached and dropped, all in one transaction. A failure leaves the
+    partition attached, and tables stranded by an older run (detached but not
+    dropped) are picked up again, so the next run retries them.
+    """
+    cutoff = add_months(month_start(today or datetime.utcnow()), -older_than_months)
+    os.makedirs(export_dir, exist_ok=True)
+
+    with engine.connect() as conn:
+        if not is_partitioned(conn):
+            return []
+        attached = set(list_partitions(conn))
+        orphaned = list_orphaned_partitions(conn)
+
+    archived = []
+    for name in archive_candidates(list(attached) + orphaned, cutoff):
+        path = os.path.join(export_dir, f"{name}.csv.gz")
+        archive_table(engine, name, path, detach=name in attached)
+        archived.append(path)
+    return archived
+
+
+def archive_table(engine, table_name, path, detach=True):
+    """Stream a table to a gzip-compressed CSV file with COPY, then drop it.
+
+    The export, DETACH and DROP share one transaction, and the file is fully
+    written before the commit, so the rows are never lost.
+    """
+    raw = engine.raw_connection()
+    try:
+        cursor = raw.cursor()
+        with gzip.open(path, "wb") as fh:
+            cursor.copy_expert(f"COPY {table_name} TO STDOUT WITH (FORMAT csv, HEADER)", fh)
+        if detach:
+            cursor.execute(f"ALTER TABLE {PARENT_TABLE} DETACH PARTITION {table_name}")
+        cursor.execute(f"DROP TABLE {table_name}")
+        cursor.close()
+        raw.commit()
+    except Exception:
+        raw.rollback()
+        raise
+    finally:
+        raw.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Manage monthly partitions of the orders table")
+    parser.add_argument("--database-url", default=os.getenv("DATABASE_URL"))
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    ensure = sub.add_parser("ensure", help="create upcoming monthly partitions")
+    ensure.add_argument("--months-ahead", type=int, default=3)
+
+    archive = sub.add_parser("archive", help="detach and export old partitions")
+    archive.add_argument("--older-than-months", type=int, default=12)
+    archive.add_argument("--export-dir", default="./archive")
+
+    args = parser.parse_args(argv)
+    engine = create_engine(args.database_url)
+
+    if args.command == "ensure":
+        try:
+            created = ensure_future_partitions(engine, args.months_ahead)
+        except PartitionCreationError as exc:
+            for name in exc.created:
+                print(f"created {name}")
+            # non-zero exit so the scheduler running this job sees the failure
+            print(f"error: {exc}", file=sys.stderr)
+            return 1
+        for name in created:
+            print(f"created {name}")
+    else:
+        for path in archive_partitions(engine, args.older_than_months, args.export_dir):
+            print(f"archived {path}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
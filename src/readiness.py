@@ -0,0 +1,188 @@
+"""Cached deep readiness probe for /ready.
+
+Running DB and gateway checks on every probe would add load exactly when the
+pod is struggling, so ReadinessProbe runs them in a background task every
+`interval` seconds and /ready only returns the last pre-encoded result.
+
+A pod reports not-ready when:
+- the DB ping or the gateway reachability check fails,
+- DB pool or HTTP pool utilization reaches its threshold (a full DB pool
+  also skips the ping, which would otherwise queue behind app requests),
+- the recent gateway error rate reaches its threshold,
+- or the cached result is stale (the background task stopped running).
+"""
+import asyncio
+import time
+from collections import deque
+from datetime import datetime
+
+import httpx
+from fastapi.responses import Response
+from sqlalchemy import text
+from sqlalchemy.pool import QueuePool
+
+from src.responses import JSON_MEDIA_TYPE, encode_json
+
+
+class GatewayStats:
+    """In-flight count and recent outcomes of calls to the payment gateway."""
+
+    def __init__(self, max_connections, window_seconds=60.0, min_samples=5):
+        self.max_connections = max_connections
+        self.window_seconds = window_seconds
+        self.min_samples = min_samples
+        self.in_flight = 0
+        self._outcomes = deque()
+
+    async def post(self, client, url, **kwargs):
+        """client.post() that records the outcome. 5xx and transport errors count as errors."""
+        self.in_flight += 1
+        try:
+            response = await client.post(url, **kwargs)
+        except httpx.HTTPError:
+            self.record(False)
+            raise
+        finally:
+            self.in_flight -= 1
+        self.record(response.status_code < 500)
+        return response
+
+    def record(self, ok, now=None):
+        self._outcomes.append((now or time.monotonic(), ok))
+        self._trim(now)
+
+    def _trim(self, now=None):
+        cutoff = (now or time.monotonic()) - self.window_seconds
+        while self._outcomes and self._outcomes[0][0] < cutoff:
+            self._outcomes.popleft()
+
+    def snapshot(self, now=None):
+        self._trim(now)
+        samples = len(self._outcomes)
+        errors = sum(1 for _, ok in self._outcomes if not ok)
+        # too few calls to say anything useful about the error rate
+        error_rate = errors / samples if samples >= self.min_samples else 0.0
+        return {
+            "in_flight": self.in_flight,
+            "max_connections": self.max_connections,
+            "utilization": self.in_flight / self.max_connections if self.max_connections else 0.0,
+            "recent_calls": samples,
+            "recent_errors": errors,
+            "error_rate": round(error_rate, 4),
+        }
+
+
+def db_pool_stats(engine, max_overflow):
+    """Checked-out/overflow counts for a QueuePool; empty for other pool types (e.g. SQLite).
+
+    `max_overflow` is the value the engine was created with. When it is
+    negative (unlimited overflow) capacity and utilization are reported as None.
+    """
+    pool = engine.pool
+    if not isinstance(pool, QueuePool):
+        return {}
+    size = pool.size()
+    capacity = size + max_overflow if max_overflow >= 0 else None
+    checked_out = pool.checkedout()
+    return {
+        "size": size,
+        "checked_out": checked_out,
+        "overflow": max(pool.overflow(), 0),
+        "capacity": capacity,
+        "utilization": checked_out / capacity if capacity else None,
+    }
+
+
+class ReadinessProbe:
+    def __init__(
+        self,
+        engine,
+        gateway_stats,
+        check_gateway,
+        interval=5.0,
+        check_timeout=2.0,
+        db_max_overflow=10,
+        db_pool_max_utilization=0.9,
+        http_pool_max_utilization=0.9,
+        gateway_max_error_rate=0.5,
+    ):
+        self.engine = engine
+        self.gateway_stats = gateway_stats
+        self.check_gateway = check_gateway
+        self.interval = interval
+        self.check_timeout = check_timeout
+        self.db_max_overflow = db_max_overflow
+        self.db_pool_max_utilization = db_pool_max_utilization
+        self.http_pool_max_utilization = http_pool_max_utilization
+        self.gateway_max_error_rate = gateway_max_error_rate
+
+        self.checked_at = None
+        self._status_code = 503
+        self._body = encode_json({"status": "starting"})
+
+    def _ping_db(self):
+        with self.engine.connect() as conn:
+            conn.execute(text("SELECT 1"))
+
+    async def _run_check(self, check):
+        try:
+            await asyncio.wait_for(check, timeout=self.check_timeout)
+            return "ok"
+        except asyncio.TimeoutError:
+            return "timeout"
+        except Exception as exc:
+            return f"error: {type(exc).__name__}"
+
+    async def refresh(self):
+        db_pool = db_pool_stats(self.engine, self.db_max_overflow)
+        pool_full = db_pool.get("capacity") is not None and db_pool["checked_out"] >= db_pool["capacity"]
+        if pool_full:
+            # engine.connect() would wait up to pool_timeout for a free slot and
+            # then take it ahead of real requests; the pool being full is the answer
+            db = "skipped"
+        else:
+            db = await self._run_check(asyncio.to_thread(self._ping_db))
+        gateway = await self._run_check(self.check_gateway())
+        http_pool = self.gateway_stats.snapshot()
+
+        reasons = []
+        if db not in ("ok", "skipped"):
+            reasons.append("database unreachable")
+        if gateway != "ok":
+            reasons.append("gateway unreachable")
+        if pool_full or (db_pool.get("utilization") is not None
+                         and db_pool["utilization"] >= self.db_pool_max_utilization):
+            reasons.append("database pool saturated")
+        if http_pool["utilization"] >= self.http_pool_max_utilization:
+            reasons.append("http pool saturated")
+        if http_pool["error_rate"] >= self.gateway_max_error_rate:
+            reasons.append("gateway error rate too high")
+
+        self.checked_at = time.monotonic()
+        self._status_code = 503 if reasons else 200
+        self._body = encode_json({
+            "status": "not_ready" if reasons else "ready",
+            "reasons": reasons,
+            "checks": {"database": db, "gateway": gateway},
+            "db_pool": db_pool,
+            "http_pool": http_pool,
+            "checked_at": datetime.utcnow().isoformat(),
+        })
+
+    async def run(self):
+        while True:
+            try:
+                await self.refresh()
+            except Exception as exc:
+                print(f"⚠️ Readiness check failed: {exc}")
+            await asyncio.sleep(self.interval)
+
+    def response(self):
+        """Return the cached result; no I/O happens here."""
+        if self.checked_at is not None and time.monotonic() - self.checked_at > 3 * self.interval:
+            return Response(
+                content=encode_json({"status": "not_ready", "reasons": ["readiness result is stale"]}),
+                status_code=503,
+                media_type=JSON_MEDIA_TYPE,
+            )
+        return Response(content=self._body, status_code=self._status_code, media_type=JSON_MEDIA_TYPE)
@@ -0,0 +1,68 @@
+"""Fast JSON response helpers.
+
+FastAPI's default path for a returned dict is jsonable_encoder -> (optional
+response_model validation) -> json.dumps. For our hot endpoints the payloads
+are plain dicts built by our own code, so we skip that and encode directly:
+
+- FastJSONResponse: orjson-backed response class (falls back to the stock
+  JSONResponse when orjson is missing or FAST_JSON_RESPONSES=0).
+- constant_json(): encodes a fixed payload once; every call returns a new
+  Response that reuses the same bytes.
+- error_response(): {"detail": ...} bodies, with the encoded bytes cached per
+  message since error details come from a small fixed set.
+
+Run `python benchmarks/bench_responses.py` to compare against the generic path.
+"""
+import json
+import os
+from functools import lru_cache
+
+from fastapi.responses import JSONResponse, ORJSONResponse, Response
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson is pinned in requirements.txt
+    orjson = None
+
+FAST_JSON_ENABLED = orjson is not None and os.getenv("FAST_JSON_RESPONSES", "1") != "0"
+
+FastJSONResponse = ORJSONResponse if FAST_JSON_ENABLED else JSONResponse
+
+JSON_MEDIA_TYPE = "application/json"
+
+
+def encode_json(content) -> bytes:
+    """Encode `content` exactly the way FastJSONResponse would."""
+    if FAST_JSON_ENABLED:
+        return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(
+        content, ensure_ascii=False, allow_nan=False, indent=None, separators=(",", ":")
+    ).encode("utf-8")
+
+
+def constant_json(content, status_code: int = 200):
+    """Pre-encode a constant payload and return a factory for its responses.
+
+    Response objects carry per-request state (headers, background tasks), so
+    the factory builds a fresh one each time around the shared body bytes.
+    """
+    body = encode_json(content)
+
+    def build(headers=None) -> Response:
+        return Response(content=body, status_code=status_code, headers=headers, media_type=JSON_MEDIA_TYPE)
+
+    return build
+
+
+@lru_cache(maxsize=256)
+def _detail_body(detail: str) -> bytes:
+    return encode_json({"detail": detail})
+
+
+def error_response(status_code: int, detail, headers=None) -> Response:
+    """Build a {"detail": ...} error response, reusing cached bytes for string details."""
+    if isinstance(detail, str):
+        body = _detail_body(detail)
+    else:
+        body = encode_json({"detail": detail})
+    return Response(content=body, status_code=status_code, headers=headers, media_type=JSON_MEDIA_TYPE)
@@ -0,0 +1,50 @@
+from datetime import date, datetime
+
+from sqlalchemy import create_engine
+
+from src.partitioning import (
+    add_months,
+    archive_candidates,
+    archive_partitions,
+    create_partition_sql,
+    ensure_future_partitions,
+    month_start,
+    parse_partition_name,
+    partition_name,
+)
+
+
+def test_month_arithmetic_wraps_years():
+    assert month_start(datetime(2026, 10, 19, 13, 5)) == date(2026, 10, 1)
+    assert add_months(date(2026, 11, 1), 3) == date(2027, 2, 1)
+    assert add_months(date(2026, 1, 1), -1) == date(2025, 12, 1)
+
+
+def test_partition_name_round_trip():
+    assert partition_name(date(2026, 3, 1)) == "orders_p2026_03"
+    assert parse_partition_name("orders_p2026_03") == date(2026, 3, 1)
+    assert parse_partition_name("orders_default") is None
+
+
+def test_create_partition_sql_covers_one_month():
+    sql = create_partition_sql(date(2026, 12, 1))
+    assert "orders_p2026_12 PARTITION OF orders" in sql
+    assert "FROM ('2026-12-01') TO ('2027-01-01')" in sql
+
+
+def test_non_postgres_database_is_left_alone(tmp_path):
+    engine = create_engine("sqlite:///:memory:")
+    assert ensure_future_partitions(engine) == []
+    assert archive_partitions(engine, 12, str(tmp_path / "archive")) == []
+
+
+def test_archive_candidates_only_whole_months_before_cutoff():
+    names = ["orders_default", "orders_p2025_08", "orders_p2025_09", "orders_p2025_10"]
+    assert archive_candidates(names, date(2025, 10, 1)) == ["orders_p2025_08", "orders_p2025_09"]
+
+
+def test_archive_candidates_include_tables_stranded_by_earlier_run():
+    # orders_p2024_01 was detached by a run that died before dropping it
+    attached = ["orders_default", "orders_p2025_09"]
+    orphaned = ["orders_p2024_01"]
+    assert archive_candidates(attached + orphaned, date(2025, 10, 1)) == ["orders_p2024_01", "orders_p2025_09"]
@@ -0,0 +1,157 @@
+import asyncio
+import json
+import time
+
+import httpx
+
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.pool import QueuePool
+
+from src.main import app
+from src.readiness import GatewayStats, ReadinessProbe, db_pool_stats
+
+client = TestClient(app)
+
+
+async def gateway_ok():
+    return None
+
+
+async def gateway_down():
+    raise ConnectionError("gateway unreachable")
+
+
+def make_probe(check_gateway=gateway_ok, stats=None, **kwargs):
+    engine = create_engine("sqlite:///:memory:")
+    return ReadinessProbe(engine, stats or GatewayStats(max_connections=10), check_gateway, **kwargs)
+
+
+def test_ready_endpoint_not_ready_before_first_check():
+    response = client.get("/ready")
+    assert response.status_code == 503
+    assert response.json() == {"status": "starting"}
+
+
+def test_gateway_error_rate_needs_min_samples():
+    stats = GatewayStats(max_connections=10, window_seconds=60, min_samples=4)
+    for ok in (False, False, True):
+        stats.record(ok, now=100.0)
+    assert stats.snapshot(now=100.0)["error_rate"] == 0.0
+
+    stats.record(True, now=100.0)
+    assert stats.snapshot(now=100.0)["error_rate"] == 0.5
+    # outcomes older than the window are dropped
+    assert stats.snapshot(now=200.0)["recent_calls"] == 0
+
+
+def test_probe_ready_when_checks_pass():
+    probe = make_probe()
+    asyncio.run(probe.refresh())
+    response = probe.response()
+    body = json.loads(response.body)
+    assert response.status_code == 200
+    assert body["status"] == "ready"
+    assert body["checks"] == {"database": "ok", "gateway": "ok"}
+
+
+def test_probe_not_ready_when_gateway_unreachable():
+    probe = make_probe(check_gateway=gateway_down)
+    asyncio.run(probe.refresh())
+    response = probe.response()
+    assert response.status_code == 503
+    assert json.loads(response.body)["reasons"] == ["gateway unreachable"]
+
+
+def test_probe_not_ready_when_http_pool_saturated():
+    stats = GatewayStats(max_connections=10)
+    stats.in_flight = 9
+    probe = make_probe(stats=stats, http_pool_max_utilization=0.9)
+    asyncio.run(probe.refresh())
+    response = probe.response()
+    assert response.status_code == 503
+    assert json.loads(response.body)["reasons"] == ["http pool saturated"]
+
+
+def test_probe_reports_stale_result():
+    probe = make_probe(interval=1.0)
+    asyncio.run(probe.refresh())
+    probe.checked_at -= 10
+    response = probe.response()
+    assert response.status_code == 503
+    assert json.loads(response.body)["reasons"] == ["readiness result is stale"]
+
+
+def test_db_pool_stats_unlimited_overflow_has_no_utilization(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'pool.db'}", poolclass=QueuePool, pool_size=1, max_overflow=-1)
+    with engine.connect(), engine.connect():
+        stats = db_pool_stats(engine, max_overflow=-1)
+    assert stats["checked_out"] == 2
+    assert stats["overflow"] == 1
+    assert stats["capacity"] is None
+    assert stats["utilization"] is None
+
+
+def test_probe_skips_db_ping_when_pool_is_full(tmp_path):
+    # pool_timeout=30: a ping queueing for a connection would stall this test
+    engine = create_engine(f"sqlite:///{tmp_path / 'pool.db'}", poolclass=QueuePool, pool_size=1, max_overflow=0)
+    probe = ReadinessProbe(engine, GatewayStats(max_connections=10), gateway_ok, db_max_overflow=0)
+    with engine.connect():
+        asyncio.run(asyncio.wait_for(probe.refresh(), timeout=5))
+    body = json.loads(probe.response().body)
+    assert probe.response().status_code == 503
+    assert body["checks"]["database"] == "skipped"
+    assert body["reasons"] == ["database pool saturated"]
+    assert body["db_pool"]["checked_out"] == 1
+
+
+def wait_for_first_check(lifespan_client):
+    deadline = time.monotonic() + 5
+    while time.monotonic() < deadline:
+        response = lifespan_client.get("/ready")
+        if response.json()["status"] != "starting":
+            return response
+        time.sleep(0.01)
+    raise AssertionError("readiness probe never ran")
+
+
+def use_gateway(monkeypatch, handler):
+    monkeypatch.setattr(
+        "src.main.make_http_client",
+        lambda: httpx.AsyncClient(transport=httpx.MockTransport(handler)),
+    )
+
+
+def gateway_up(request):
+    return httpx.Response(404)
+
+
+def gateway_unreachable(request):
+    raise httpx.ConnectError("connection refused", request=request)
+
+
+def test_lifespan_reports_ready_when_gateway_reachable(monkeypatch):
+    use_gateway(monkeypatch, gateway_up)
+    with TestClient(app) as lifespan_client:
+        response = wait_for_first_check(lifespan_client)
+    assert response.status_code == 200
+    assert response.json()["checks"] == {"database": "ok", "gateway": "ok"}
+
+
+def test_lifespan_reports_not_ready_when_gateway_unreachable(monkeypatch):
+    use_gateway(monkeypatch, gateway_unreachable)
+    with TestClient(app) as lifespan_client:
+        response = wait_for_first_check(lifespan_client)
+    assert response.status_code == 503
+    assert response.json()["reasons"] == ["gateway unreachable"]
+    assert response.json()["checks"]["gateway"] == "error: ConnectError"
+
+
+def test_lifespan_can_run_more_than_once(monkeypatch):
+    # each lifespan gets its own gateway client, bound to its own event loop
+    use_gateway(monkeypatch, gateway_up)
+    for _ in range(2):
+        with TestClient(app) as lifespan_client:
+            assert wait_for_first_check(lifespan_client).status_code == 200
+            assert not app.state.http_client.is_closed
+    assert not hasattr(app.state, "http_client")
@@ -0,0 +1,43 @@
+import json
+
+from fastapi.testclient import TestClient
+
+from src.main import ORDER_COMPLETED_RESPONSE, app
+from src.responses import constant_json, encode_json, error_response
+
+client = TestClient(app)
+
+
+def test_encode_json_is_compact():
+    assert encode_json({"detail": "Password is required"}) == b'{"detail":"Password is required"}'
+    assert json.loads(encode_json({"name": "สมชาย"})) == {"name": "สมชาย"}
+
+
+def test_constant_json_reuses_body_in_fresh_responses():
+    build = constant_json({"order_status": "COMPLETED"}, status_code=201)
+    first, second = build(), build()
+    assert first is not second
+    assert first.body is second.body
+    assert first.status_code == 201
+    assert first.headers["content-type"] == "application/json"
+
+
+def test_order_completed_payload():
+    response = ORDER_COMPLETED_RESPONSE()
+    assert response.status_code == 201
+    assert json.loads(response.body) == {"order_status": "COMPLETED"}
+
+
+def test_error_response_caches_string_details():
+    assert error_response(400, "Password is required").body is error_response(400, "Password is required").body
+    assert json.loads(error_response(422, ["a", "b"]).body) == {"detail": ["a", "b"]}
+
+
+def test_http_exception_body_unchanged():
+    response = client.get("/hello/World1")
+    assert response.status_code == 400
+    assert response.json() == {"detail": "Name must contain only alphabets"}
+
+    response = client.get("/does-not-exist")
+    assert response.status_code == 404
+    assert response.json() == {"detail": "Not Found"}